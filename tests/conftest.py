@@ -0,0 +1,24 @@
+"""
+Test session configuration for pytest
+"""
+import os
+import uuid
+from contextlib import suppress
+from sqlalchemy.exc import OperationalError
+from service.config import DATABASE_URI
+from tests.database import RUN_ID, drop_template_database
+
+
+def pytest_configure(config):
+    """Gives the controller and every xdist worker the same database run id"""
+    if not hasattr(config, "workerinput"):
+        os.environ.setdefault(RUN_ID, uuid.uuid4().hex[:8])
+
+
+def pytest_unconfigure(config):
+    """Drops the template database once the workers have finished"""
+    if not hasattr(config, "workerinput"):
+        # the template is only built when a model test needs it, so an
+        # unreachable server here just means there is nothing to drop
+        with suppress(OperationalError):
+            drop_template_database(DATABASE_URI)
@@ -0,0 +1,104 @@
+# Copyright 2016, 2023 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Test Database helpers
+
+The tables are created once per test run in a template database and every
+xdist worker's model tests work in their own copy of it. Database names
+carry a run id so test runs sharing a server never touch each other's
+databases.
+"""
+import os
+import atexit
+from sqlalchemy import create_engine, make_url, text
+from service.models import db
+from tests.database_uri import without_synchronous_commit
+
+DATABASE = "product"
+# Set by tests/conftest.py so the pytest controller and its workers agree
+RUN_ID = "PRODUCT_TEST_RUN_ID"
+
+
+def _run_id() -> str:
+    """Returns the id shared by every process of this test run"""
+    return os.getenv(RUN_ID, str(os.getpid()))
+
+
+def _template_database() -> str:
+    """Returns the name of this test run's template database"""
+    return f"{DATABASE}_tmpl_{_run_id()}"
+
+
+def _database_uri(database_uri: str, database: str) -> str:
+    """Returns the URI of another database on the same server"""
+    url = make_url(database_uri).set(database=database)
+    return url.render_as_string(hide_password=False)
+
+
+def _server(database_uri: str):
+    """Returns an engine for statements that cannot run inside a transaction"""
+    return create_engine(database_uri, isolation_level="AUTOCOMMIT")
+
+
+def _drop(database_uri: str, database: str):
+    """Drops a database if it exists"""
+    engine = _server(database_uri)
+    with engine.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+    engine.dispose()
+
+
+def create_template_database(database_uri: str):
+    """Creates this test run's template database and its tables"""
+    template = _template_database()
+    engine = _server(database_uri)
+    with engine.connect() as connection:
+        connection.execute(text(f'CREATE DATABASE "{template}"'))
+    engine.dispose()
+    engine = create_engine(_database_uri(database_uri, template))
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+
+def drop_template_database(database_uri: str):
+    """Drops this test run's template database"""
+    _drop(database_uri, _template_database())
+
+
+def clone_template_database(database_uri: str) -> str:
+    """Creates a database private to this xdist worker and returns its URI"""
+    template = _template_database()
+    database = f"{DATABASE}_{_run_id()}_{os.getenv('PYTEST_XDIST_WORKER', 'gw0')}"
+    engine = _server(database_uri)
+    with engine.connect() as connection:
+        # the first worker to get here builds the template, the others wait
+        connection.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": template})
+        exists = connection.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": template}
+        ).first()
+        if exists is None:
+            create_template_database(database_uri)
+            if RUN_ID not in os.environ:
+                # no pytest controller (unittest, nose) will drop it for us
+                atexit.register(drop_template_database, database_uri)
+        connection.execute(text(f'CREATE DATABASE "{database}" TEMPLATE "{template}"'))
+        connection.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": template})
+    engine.dispose()
+    return without_synchronous_commit(_database_uri(database_uri, database))
+
+
+def drop_database(database_uri: str, clone_uri: str):
+    """Drops a database created by clone_template_database()"""
+    _drop(database_uri, make_url(clone_uri).database)
@@ -0,0 +1,29 @@
+# Copyright 2016, 2023 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Test Database URI helpers
+
+Kept free of test-only dependencies so any test module can import them
+"""
+from sqlalchemy import make_url
+
+
+def without_synchronous_commit(database_uri: str) -> str:
+    """Returns a URI whose connections do not wait for the WAL flush on commit"""
+    url = make_url(database_uri)
+    options = " ".join(filter(None, [url.query.get("options"), "-csynchronous_commit=off"]))
+    url = url.update_query_dict({"options": options})
+    return url.render_as_string(hide_password=False)